@@ -1,74 +1,189 @@
 import ast
-from typing import List, Dict, Optional
-from pydantic import BaseModel, Field
-import difflib
-
-
-class ChangeType(BaseModel):
+import hashlib
+import json
+import os
+import pickle
+import sys
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from itertools import zip_longest
+from typing import Any, List, Dict, Optional, Set
+
+try:
+    import msgspec  # type: ignore[import-not-found]
+except ImportError:
+    msgspec = None  # type: ignore[assignment]
+
+
+def _to_json(obj: Any) -> str:
+    # msgspec encodes dataclass trees from C without building a dict
+    # intermediate, far faster than json.dumps(asdict(...)).
+    if msgspec is not None:
+        return msgspec.json.format(msgspec.json.encode(obj), indent=2).decode()
+    return json.dumps(asdict(obj), indent=2)
+
+_AST_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ams_ast")
+
+# Minimum number of shared functions before analyze_changes farms the
+# per-function work out to a process pool.
+_PARALLEL_THRESHOLD = 64
+
+
+@lru_cache(maxsize=512)
+def _parse_cached(src: str) -> ast.Module:
+    """Parse source, reusing a pickled AST from disk when the same source
+    (and Python version) has been parsed before."""
+    key = "%s-%d.%d" % (hashlib.sha256(src.encode()).hexdigest(),
+                        *sys.version_info[:2])
+    path = os.path.join(_AST_CACHE_DIR, key + ".pkl")
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError):
+        pass
+    tree = ast.parse(src)
+    try:
+        os.makedirs(_AST_CACHE_DIR, exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump(tree, f, protocol=5)
+    except OSError:
+        pass
+    return tree
+
+
+@dataclass(slots=True, frozen=True)
+class ChangeType:
     type: str  # 'no_change', 'minor', 'significant', 'major'
     description: str
     priority: int
 
 
-class FunctionChange(BaseModel):
+# Fixed change categories, built once at import: the hot paths hand out
+# these shared (frozen) singletons instead of allocating one per change.
+CT_IMPORT = ChangeType(type="significant", description="Import statement changed", priority=7)
+CT_ASSIGN = ChangeType(type="minor", description="Variable assignment changed", priority=3)
+CT_CTRL = ChangeType(type="major", description="Control flow changed", priority=9)
+CT_DEF = ChangeType(type="major", description="Function or class definition changed", priority=10)
+CT_LOGIC = ChangeType(type="significant", description="Code logic changed", priority=5)
+CT_SIGNATURE = ChangeType(type="significant", description="Function signature changed", priority=8)
+CT_NESTED = ChangeType(type="major", description="Nested function structure changed", priority=9)
+
+# Classification of a changed top-level statement by its AST class.
+_BODY_CHANGE_TYPES: Dict[type, ChangeType] = {}
+for _stmt_classes, _change_type in (
+    ((ast.If, ast.For, ast.While, ast.Try, ast.With), CT_CTRL),
+    ((ast.Import, ast.ImportFrom), CT_IMPORT),
+    ((ast.Assign, ast.AugAssign, ast.AnnAssign), CT_ASSIGN),
+    ((ast.FunctionDef, ast.ClassDef), CT_DEF),
+):
+    for _stmt_class in _stmt_classes:
+        _BODY_CHANGE_TYPES[_stmt_class] = _change_type
+
+
+# Serializations keyed by node identity, amortized across repeated
+# comparisons of the same nodes; entries die with their tree.
+_DUMP_CACHE: "weakref.WeakKeyDictionary[ast.AST, str]" = weakref.WeakKeyDictionary()
+
+
+def _dump(node: ast.AST) -> str:
+    cached = _DUMP_CACHE.get(node)
+    if cached is None:
+        cached = _DUMP_CACHE[node] = ast.dump(node, annotate_fields=False)
+    return cached
+
+
+def _nested_names(func: ast.FunctionDef) -> Set[str]:
+    """Names of functions nested directly under func, without descending
+    into the nested functions themselves."""
+    out: Set[str] = set()
+    stack: List[ast.AST] = list(func.body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.FunctionDef):
+            out.add(node.name)
+            continue
+        for field_name in node._fields:
+            value = getattr(node, field_name, None)
+            if isinstance(value, list):
+                stack.extend(x for x in value if isinstance(x, ast.AST))
+            elif isinstance(value, ast.AST):
+                stack.append(value)
+    return out
+
+
+@dataclass(slots=True)
+class FunctionChange:
     name: str
     signature_change: Optional[ChangeType] = None
-    body_changes: List[ChangeType] = Field(default_factory=list)
+    body_changes: List[ChangeType] = field(default_factory=list)
     nested_function_change: Optional[ChangeType] = None
 
 
-class ClassMethodChange(BaseModel):
+@dataclass(slots=True)
+class ClassMethodChange:
     class_name: str
     method_name: str
     signature_change: Optional[ChangeType] = None
-    body_changes: List[ChangeType] = Field(default_factory=list)
+    body_changes: List[ChangeType] = field(default_factory=list)
 
 
-class ChangeAnalysis(BaseModel):
-    added_functions: List[str] = Field(default_factory=list)
-    removed_functions: List[str] = Field(default_factory=list)
-    changed_functions: List[FunctionChange] = Field(default_factory=list)
-    changed_class_methods: List[ClassMethodChange] = Field(
+@dataclass(slots=True)
+class ChangeAnalysis:
+    added_functions: List[str] = field(default_factory=list)
+    removed_functions: List[str] = field(default_factory=list)
+    changed_functions: List[FunctionChange] = field(default_factory=list)
+    changed_class_methods: List[ClassMethodChange] = field(
         default_factory=list)
 
 
-class ASTVisitor(ast.NodeVisitor):
-    def __init__(self):
-        self.functions: Dict[str, ast.FunctionDef] = {}
-        self.classes: Dict[str, ast.ClassDef] = {}
-
-    def visit_FunctionDef(self, node: ast.FunctionDef):
-        self.functions[node.name] = node
-        self.generic_visit(node)
-
-    def visit_ClassDef(self, node: ast.ClassDef):
-        self.classes[node.name] = node
-        self.generic_visit(node)
-
-
 class CodeChangeAnalyzer:
     def __init__(self, old_code: str, new_code: str):
         self.old_code = old_code
         self.new_code = new_code
-        self.old_ast = ast.parse(old_code)
-        self.new_ast = ast.parse(new_code)
-        self.old_visitor = ASTVisitor()
-        self.new_visitor = ASTVisitor()
-        self.old_visitor.visit(self.old_ast)
-        self.new_visitor.visit(self.new_ast)
+        self.old_ast = _parse_cached(old_code)
+        self.new_ast = _parse_cached(new_code)
+        # Only module-level definitions matter here, so one scan of
+        # tree.body replaces a full NodeVisitor walk (which also wrongly
+        # swept methods and nested defs into the function table).
+        self.old_functions = {n.name: n for n in self.old_ast.body
+                              if isinstance(n, ast.FunctionDef)}
+        self.old_classes = {n.name: n for n in self.old_ast.body
+                            if isinstance(n, ast.ClassDef)}
+        self.new_functions = {n.name: n for n in self.new_ast.body
+                              if isinstance(n, ast.FunctionDef)}
+        self.new_classes = {n.name: n for n in self.new_ast.body
+                            if isinstance(n, ast.ClassDef)}
 
     def analyze_changes(self) -> ChangeAnalysis:
         changes = ChangeAnalysis()
 
-        changes.added_functions = list(
-            set(self.new_visitor.functions.keys()) - set(self.old_visitor.functions.keys()))
-        changes.removed_functions = list(
-            set(self.old_visitor.functions.keys()) - set(self.new_visitor.functions.keys()))
-
-        for func_name in set(self.old_visitor.functions.keys()) & set(self.new_visitor.functions.keys()):
-            function_change = self._analyze_function_change(func_name)
-            if self._has_significant_changes(function_change):
-                changes.changed_functions.append(function_change)
+        # dict keys views support set operations directly, so no
+        # intermediate sets need materializing.
+        old_keys = self.old_functions.keys()
+        new_keys = self.new_functions.keys()
+        changes.added_functions = list(new_keys - old_keys)
+        changes.removed_functions = list(old_keys - new_keys)
+
+        shared_funcs = old_keys & new_keys
+
+        if len(shared_funcs) >= _PARALLEL_THRESHOLD:
+            # CPU-bound AST work is GIL-bound in-process; for large inputs
+            # fan the per-function pairs out across processes (AST nodes
+            # pickle fine). Below the threshold the pool setup costs more
+            # than it saves.
+            pairs = [(name, self.old_functions[name], self.new_functions[name])
+                     for name in shared_funcs]
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                results = executor.map(_analyze_function_change_worker, pairs)
+                changes.changed_functions = [
+                    c for c in results if self._has_significant_changes(c)]
+        else:
+            for func_name in shared_funcs:
+                function_change = self._analyze_function_change(func_name)
+                if self._has_significant_changes(function_change):
+                    changes.changed_functions.append(function_change)
 
         changes.changed_class_methods = self._analyze_class_method_changes()
 
@@ -78,7 +193,21 @@ class CodeChangeAnalyzer:
         return (change.signature_change is not None or
                 len(change.body_changes) > 0 or
                 change.nested_function_change is not None)
- 
+
+    def _analyze_function_change(self, func_name: str) -> FunctionChange:
+        old_func = self.old_functions[func_name]
+        new_func = self.new_functions[func_name]
+
+        # Unchanged functions are the common case in real diffs: one hash
+        # compare of the whole-function dumps skips the detailed analysis.
+        if _dump(old_func) == _dump(new_func):
+            return FunctionChange(name=func_name)
+
+        signature_change = self._analyze_signature_change(old_func, new_func)
+        body_changes = self._analyze_body_changes(old_func, new_func)
+        nested_function_change = self._analyze_nested_function_change(
+            old_func, new_func)
+
         return FunctionChange(
             name=func_name,
             signature_change=signature_change,
@@ -86,83 +215,59 @@ class CodeChangeAnalyzer:
             nested_function_change=nested_function_change
         )
 
-    def _analyze_signature_change(self, old_func: ast.FunctionDef, new_func: ast.FunctionDef) -> Optional[ChangeType]:
+    @staticmethod
+    def _analyze_signature_change(old_func: ast.FunctionDef, new_func: ast.FunctionDef) -> Optional[ChangeType]:
         old_args = ast.dump(old_func.args)
         new_args = ast.dump(new_func.args)
         if old_args != new_args:
-            return ChangeType(type="significant", description="Function signature changed", priority=8)
+            return CT_SIGNATURE
         return None
 
-    def _analyze_body_changes(self, old_func: ast.FunctionDef, new_func: ast.FunctionDef) -> List[ChangeType]:
-        old_body = ast.unparse(old_func).split('\n')
-        new_body = ast.unparse(new_func).split('\n')
-
+    @staticmethod
+    def _analyze_body_changes(old_func: ast.FunctionDef, new_func: ast.FunctionDef) -> List[ChangeType]:
         changes = []
-        diff = list(difflib.unified_diff(old_body, new_body, n=0))
 
-        for line in diff[2:]:  # Skip the first two lines of unified diff output
-            if line.startswith('+') or line.startswith('-'):
-                change_type = self._categorize_change(line[1:])
-                changes.append(change_type)
+        for old_stmt, new_stmt in zip_longest(old_func.body, new_func.body):
+            if (old_stmt is not None and new_stmt is not None and
+                    ast.dump(old_stmt, annotate_fields=False) ==
+                    ast.dump(new_stmt, annotate_fields=False)):
+                continue
+            stmt = new_stmt if new_stmt is not None else old_stmt
+            changes.append(_BODY_CHANGE_TYPES.get(type(stmt), CT_LOGIC))
 
         return changes
 
-    def _categorize_change(self, line: str) -> ChangeType:
-        stripped_line = line.strip()
-
-        # Check for comment changes
-        if stripped_line.startswith('#'):
-            return ChangeType(type="minor", description="Comment changed", priority=1)
-
-        # Check for import changes
-        if stripped_line.startswith('import ') or stripped_line.startswith('from '):
-            return ChangeType(type="significant", description="Import statement changed", priority=7)
-
-        # Check for whitespace-only changes
-        if not stripped_line:
-            return ChangeType(type="minor", description="Whitespace change", priority=1)
-
-        # Check for simple variable assignment
-        if '=' in stripped_line and not any(keyword in stripped_line for keyword in ['if', 'for', 'while', 'def', 'class']):
-            return ChangeType(type="minor", description="Variable assignment changed", priority=3)
-
-        # Check for control flow changes
-        if any(keyword in stripped_line for keyword in ['if', 'else', 'elif', 'for', 'while', 'try', 'except', 'with']):
-            return ChangeType(type="major", description="Control flow changed", priority=9)
-
-        # Check for function or class definition
-        if stripped_line.startswith('def ') or stripped_line.startswith('class '):
-            return ChangeType(type="major", description="Function or class definition changed", priority=10)
-
-        # Default to significant change
-        return ChangeType(type="significant", description="Code logic changed", priority=5)
-
-    def _analyze_nested_function_change(self, old_func: ast.FunctionDef, new_func: ast.FunctionDef) -> Optional[ChangeType]:
-        old_nested = set(node.name for node in ast.walk(
-            old_func) if isinstance(node, ast.FunctionDef) and node != old_func)
-        new_nested = set(node.name for node in ast.walk(
-            new_func) if isinstance(node, ast.FunctionDef) and node != new_func)
+    @staticmethod
+    def _analyze_nested_function_change(old_func: ast.FunctionDef, new_func: ast.FunctionDef) -> Optional[ChangeType]:
+        old_nested = _nested_names(old_func)
+        new_nested = _nested_names(new_func)
 
         if old_nested != new_nested:
-            return ChangeType(type="major", description="Nested function structure changed", priority=9)
+            return CT_NESTED
         return None
 
     def _analyze_class_method_changes(self) -> List[ClassMethodChange]:
         changed_methods = []
 
-        for class_name in set(self.old_visitor.classes.keys()) & set(self.new_visitor.classes.keys()):
-            old_class = self.old_visitor.classes[class_name]
-            new_class = self.new_visitor.classes[class_name]
+        for class_name in self.old_classes.keys() & self.new_classes.keys():
+            old_class = self.old_classes[class_name]
+            new_class = self.new_classes[class_name]
 
-            old_methods = {node.name: node for node in ast.walk(
-                old_class) if isinstance(node, ast.FunctionDef)}
-            new_methods = {node.name: node for node in ast.walk(
-                new_class) if isinstance(node, ast.FunctionDef)}
+            # Only direct methods count; scanning class.body avoids walking
+            # every expression in every method (and stops nested local
+            # functions from shadowing same-named methods).
+            old_methods = {node.name: node for node in old_class.body
+                           if isinstance(node, ast.FunctionDef)}
+            new_methods = {node.name: node for node in new_class.body
+                           if isinstance(node, ast.FunctionDef)}
 
-            for method_name in set(old_methods.keys()) & set(new_methods.keys()):
+            for method_name in old_methods.keys() & new_methods.keys():
                 old_method = old_methods[method_name]
                 new_method = new_methods[method_name]
 
+                if _dump(old_method) == _dump(new_method):
+                    continue
+
                 signature_change = self._analyze_signature_change(
                     old_method, new_method)
                 body_changes = self._analyze_body_changes(
@@ -179,6 +284,22 @@ class CodeChangeAnalyzer:
         return changed_methods
 
 
+def _analyze_function_change_worker(pair) -> FunctionChange:
+    """Process-pool entry point: analyze one (name, old, new) function pair."""
+    func_name, old_func, new_func = pair
+    if _dump(old_func) == _dump(new_func):
+        return FunctionChange(name=func_name)
+    return FunctionChange(
+        name=func_name,
+        signature_change=CodeChangeAnalyzer._analyze_signature_change(
+            old_func, new_func),
+        body_changes=CodeChangeAnalyzer._analyze_body_changes(
+            old_func, new_func),
+        nested_function_change=CodeChangeAnalyzer._analyze_nested_function_change(
+            old_func, new_func)
+    )
+
+
 # Example usage
 old_code = """
 def greet(name):
@@ -218,7 +339,8 @@ def new_function():
     pass
 """
 
-analyzer = CodeChangeAnalyzer(old_code, new_code)
-changes = analyzer.analyze_changes()
+if __name__ == "__main__":
+    analyzer = CodeChangeAnalyzer(old_code, new_code)
+    changes = analyzer.analyze_changes()
 
-print(changes.model_dump_json(indent=2))
+    print(_to_json(changes))
@@ -1,8 +1,23 @@
 import ast
+import re
+from itertools import zip_longest
 from typing import List, Dict, Optional, Set
 from pydantic import BaseModel, Field
 import difflib
 
+try:
+    # cdifflib's C SequenceMatcher is a documented drop-in; unified_diff
+    # picks it up through the module attribute.
+    from cdifflib import CSequenceMatcher
+    difflib.SequenceMatcher = CSequenceMatcher
+except ImportError:
+    pass
+
+# Combined line count above which the body diff is windowed per statement
+# instead of run over the whole unparsed function (difflib degrades badly
+# on large near-identical inputs).
+_DIFF_WINDOW_LIMIT = 200
+
 
 class ChangeType(BaseModel):
     type: str  # 'no_change', 'minor', 'significant', 'major'
@@ -10,6 +25,33 @@ class ChangeType(BaseModel):
     priority: int
 
 
+# Fixed change categories, built once at import: the diff loop hands out
+# these shared singletons instead of validating a fresh ChangeType per line.
+CT_COMMENT = ChangeType(type="minor", description="Comment changed", priority=1)
+CT_IMPORT = ChangeType(type="significant", description="Import statement changed", priority=7)
+CT_WS = ChangeType(type="minor", description="Whitespace change", priority=1)
+CT_ASSIGN = ChangeType(type="minor", description="Variable assignment changed", priority=3)
+CT_CTRL = ChangeType(type="major", description="Control flow changed", priority=9)
+CT_DEF = ChangeType(type="major", description="Function or class definition changed", priority=10)
+CT_LOGIC = ChangeType(type="significant", description="Code logic changed", priority=5)
+
+# One compiled scan over a source line replaces the cascade of startswith
+# and per-keyword substring loops in _categorize_change; the matched group
+# name selects a preconstructed ChangeType.
+_LINE_KW_RE = re.compile(
+    r'^(?:(?P<comment>#)'
+    r'|(?P<import>(?:import|from)\s)'
+    r'|(?P<definition>(?:def|class)\s))'
+    r'|(?P<control>\b(?:if|elif|else|for|while|try|except|with)\b)')
+
+_LINE_CHANGE_TYPES: Dict[str, ChangeType] = {
+    'comment': CT_COMMENT,
+    'import': CT_IMPORT,
+    'definition': CT_DEF,
+    'control': CT_CTRL,
+}
+
+
 class FunctionChange(BaseModel):
     name: str
     signature_change: Optional[ChangeType] = None
@@ -144,45 +186,45 @@ class CodeChangeAnalyzer:
         old_body = ast.unparse(old_func).split('\n')
         new_body = ast.unparse(new_func).split('\n')
 
-        changes = []
-        diff = list(difflib.unified_diff(old_body, new_body, n=0))
+        changes: List[ChangeType] = []
+        if len(old_body) + len(new_body) > _DIFF_WINDOW_LIMIT:
+            # Diff statement-aligned windows so difflib never sees the
+            # whole function at once; unchanged statements are skipped
+            # without diffing at all.
+            for old_stmt, new_stmt in zip_longest(old_func.body, new_func.body):
+                old_chunk = ast.unparse(old_stmt).split(
+                    '\n') if old_stmt is not None else []
+                new_chunk = ast.unparse(new_stmt).split(
+                    '\n') if new_stmt is not None else []
+                if old_chunk != new_chunk:
+                    self._collect_diff_changes(old_chunk, new_chunk, changes)
+        else:
+            self._collect_diff_changes(old_body, new_body, changes)
+
+        return changes
+
+    def _collect_diff_changes(self, old_lines: List[str], new_lines: List[str], changes: List[ChangeType]) -> None:
+        diff = list(difflib.unified_diff(old_lines, new_lines, n=0))
 
         for line in diff[2:]:  # Skip the first two lines of unified diff output
             if line.startswith('+') or line.startswith('-'):
-                change_type = self._categorize_change(line[1:])
-                changes.append(change_type)
-
-        return changes
+                changes.append(self._categorize_change(line[1:]))
 
     def _categorize_change(self, line: str) -> ChangeType:
         stripped_line = line.strip()
 
-        # Check for comment changes
-        if stripped_line.startswith('#'):
-            return ChangeType(type="minor", description="Comment changed", priority=1)
-
-        # Check for import changes
-        if stripped_line.startswith('import ') or stripped_line.startswith('from '):
-            return ChangeType(type="significant", description="Import statement changed", priority=7)
-
-        # Check for whitespace-only changes
         if not stripped_line:
-            return ChangeType(type="minor", description="Whitespace change", priority=1)
-
-        # Check for simple variable assignment
-        if '=' in stripped_line and not any(keyword in stripped_line for keyword in ['if', 'for', 'while', 'def', 'class']):
-            return ChangeType(type="minor", description="Variable assignment changed", priority=3)
+            return CT_WS
 
-        # Check for control flow changes
-        if any(keyword in stripped_line for keyword in ['if', 'else', 'elif', 'for', 'while', 'try', 'except', 'with']):
-            return ChangeType(type="major", description="Control flow changed", priority=9)
+        match = _LINE_KW_RE.search(stripped_line)
+        if match is not None and match.lastgroup is not None:
+            return _LINE_CHANGE_TYPES[match.lastgroup]
 
-        # Check for function or class definition
-        if stripped_line.startswith('def ') or stripped_line.startswith('class '):
-            return ChangeType(type="major", description="Function or class definition changed", priority=10)
+        # No comment/import/definition/control-flow keyword on the line.
+        if '=' in stripped_line:
+            return CT_ASSIGN
 
-        # Default to significant change
-        return ChangeType(type="significant", description="Code logic changed", priority=5)
+        return CT_LOGIC
 
     def _analyze_nested_function_change(self, old_func: ast.FunctionDef, new_func: ast.FunctionDef) -> Optional[ChangeType]:
         old_nested = set(node.name for node in ast.walk(
@@ -1,94 +1,236 @@
 import ast
-from typing import List, Dict, Set, Any
-from pydantic import BaseModel, Field
+import json
+import os
+import pickle
+import sys
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import List, Dict, Set, Any, Tuple
 import hashlib
 
-
-class ChangeType(BaseModel):
+try:
+    from blake3 import blake3 as _blake3  # type: ignore[import-not-found]
+except ImportError:
+    _blake3 = None  # type: ignore[assignment, misc]
+
+
+def _new_hash() -> Any:
+    # blake3 is SIMD-accelerated when installed; blake2b is the stdlib
+    # fallback.
+    if _blake3 is not None:
+        return _blake3()
+    return hashlib.blake2b(digest_size=16)
+
+try:
+    import msgspec  # type: ignore[import-not-found]
+except ImportError:
+    msgspec = None  # type: ignore[assignment]
+
+
+def _to_json(obj: Any) -> str:
+    # msgspec encodes dataclass trees from C without building a dict
+    # intermediate, far faster than json.dumps(asdict(...)).
+    if msgspec is not None:
+        return msgspec.json.format(msgspec.json.encode(obj), indent=2).decode()
+    return json.dumps(asdict(obj), indent=2)
+
+_AST_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ams_ast")
+
+# Minimum number of shared functions before analyze_changes farms the
+# per-function work out to a process pool.
+_PARALLEL_THRESHOLD = 64
+
+
+@lru_cache(maxsize=512)
+def _parse_cached(src: str) -> ast.Module:
+    """Parse source, reusing a pickled AST from disk when the same source
+    (and Python version) has been parsed before."""
+    key = "%s-%d.%d" % (hashlib.sha256(src.encode()).hexdigest(),
+                        *sys.version_info[:2])
+    path = os.path.join(_AST_CACHE_DIR, key + ".pkl")
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError):
+        pass
+    tree = ast.parse(src)
+    try:
+        os.makedirs(_AST_CACHE_DIR, exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump(tree, f, protocol=5)
+    except OSError:
+        pass
+    return tree
+
+
+@dataclass(slots=True)
+class ChangeType:
     structural: bool = False
     minor_edit: bool = False
     rearrangement: bool = False
 
 
-class FunctionChange(BaseModel):
+@dataclass(slots=True)
+class FunctionChange:
     name: str
     signature_change: bool = False
-    body_change: ChangeType = Field(default_factory=ChangeType)
+    body_change: ChangeType = field(default_factory=ChangeType)
     nested_function_change: bool = False
 
 
-class ClassMethodChange(BaseModel):
+@dataclass(slots=True)
+class ClassMethodChange:
     class_name: str
     method_name: str
     signature_change: bool = False
-    body_change: ChangeType = Field(default_factory=ChangeType)
-
-
-class ChangeAnalysis(BaseModel):
-    added_functions: List[str] = Field(default_factory=list)
-    removed_functions: List[str] = Field(default_factory=list)
-    function_changes: List[FunctionChange] = Field(default_factory=list)
-    class_method_changes: List[ClassMethodChange] = Field(default_factory=list)
-
-
-class ASTVisitor(ast.NodeVisitor):
-    def __init__(self):
-        self.functions: Dict[str, ast.FunctionDef] = {}
-        self.classes: Dict[str, ast.ClassDef] = {}
-
-    def visit_FunctionDef(self, node: ast.FunctionDef):
-        self.functions[node.name] = node
-        self.generic_visit(node)
-
-    def visit_ClassDef(self, node: ast.ClassDef):
-        self.classes[node.name] = node
-        self.generic_visit(node)
-
-
-class ASTHasher(ast.NodeVisitor):
-    def __init__(self):
-        self.hash = hashlib.md5()
-
-    def visit(self, node: ast.AST):
-        self.hash.update(type(node).__name__.encode())
-        for field, value in ast.iter_fields(node):
+    body_change: ChangeType = field(default_factory=ChangeType)
+
+
+@dataclass(slots=True)
+class ChangeAnalysis:
+    added_functions: List[str] = field(default_factory=list)
+    removed_functions: List[str] = field(default_factory=list)
+    function_changes: List[FunctionChange] = field(default_factory=list)
+    class_method_changes: List[ClassMethodChange] = field(default_factory=list)
+
+
+def _classify_fields(node: ast.AST) -> List[Tuple[str, int]]:
+    return [(field,
+             2 if isinstance(value, list) else
+             1 if isinstance(value, ast.AST) else 0)
+            for field, value in ast.iter_fields(node)]
+
+
+# Field layout per ast node class: (name, kind) with kind 0 = scalar,
+# 1 = single AST node, 2 = list of AST nodes. Classifying once here (and on
+# first sight for classes the sample misses) keeps isinstance checks out of
+# the per-field comparison loop.
+_FIELD_KIND: Dict[type, List[Tuple[str, int]]] = {}
+for _node in ast.walk(ast.parse("def f(x, y=1):\n    return [x for x in y]")):
+    _FIELD_KIND.setdefault(type(_node), _classify_fields(_node))
+
+
+def _nested_names(func: ast.FunctionDef) -> Set[str]:
+    """Names of functions nested directly under func, without descending
+    into the nested functions themselves."""
+    out: Set[str] = set()
+    stack: List[ast.AST] = list(func.body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.FunctionDef):
+            out.add(node.name)
+            continue
+        for field_name in node._fields:
+            value = getattr(node, field_name, None)
             if isinstance(value, list):
-                for item in value:
-                    if isinstance(item, ast.AST):
-                        self.visit(item)
+                stack.extend(x for x in value if isinstance(x, ast.AST))
             elif isinstance(value, ast.AST):
-                self.visit(value)
-        return self.hash.hexdigest()
+                stack.append(value)
+    return out
+
+
+# Digests keyed by node identity: equality checks on the same nodes recur
+# throughout an analysis, so amortize across calls. AST nodes support
+# weakrefs, so entries die with their tree.
+_TREE_HASH_CACHE: "weakref.WeakKeyDictionary[ast.AST, bytes]" = weakref.WeakKeyDictionary()
+
+
+def _feed_tree(node: ast.AST, h: Any) -> None:
+    h.update(type(node).__name__.encode())
+    kinds = _FIELD_KIND.get(type(node))
+    if kinds is None:
+        kinds = _FIELD_KIND[type(node)] = _classify_fields(node)
+    for field_name, kind in kinds:
+        value: Any = getattr(node, field_name, None)
+        if kind == 2:
+            h.update(b'[%d' % len(value))
+            for item in value:
+                if isinstance(item, ast.AST):
+                    _feed_tree(item, h)
+                else:
+                    h.update(repr(item).encode())
+            h.update(b']')
+        elif kind == 1:
+            if value is None:
+                h.update(b'-')
+            else:
+                _feed_tree(value, h)
+        elif isinstance(value, ast.AST):
+            # Optional AST field first classified from a None sample.
+            _feed_tree(value, h)
+        else:
+            h.update(repr(value).encode())
+        h.update(b';')
+
+
+def _tree_hash(node: ast.AST) -> bytes:
+    """Canonical digest of a subtree, streamed straight into the hash so no
+    intermediate dump string is materialized."""
+    cached = _TREE_HASH_CACHE.get(node)
+    if cached is None:
+        h = _new_hash()
+        _feed_tree(node, h)
+        cached = _TREE_HASH_CACHE[node] = h.digest()
+    return cached
 
 
 class CodeChangeAnalyzer:
     def __init__(self, old_code: str, new_code: str):
-        self.old_ast = ast.parse(old_code)
-        self.new_ast = ast.parse(new_code)
-        self.old_visitor = ASTVisitor()
-        self.new_visitor = ASTVisitor()
-        self.old_visitor.visit(self.old_ast)
-        self.new_visitor.visit(self.new_ast)
+        self.old_ast = _parse_cached(old_code)
+        self.new_ast = _parse_cached(new_code)
+        # Only module-level definitions matter here, so one scan of
+        # tree.body replaces a full NodeVisitor walk (which also wrongly
+        # swept methods and nested defs into the function table).
+        self.old_functions = {n.name: n for n in self.old_ast.body
+                              if isinstance(n, ast.FunctionDef)}
+        self.old_classes = {n.name: n for n in self.old_ast.body
+                            if isinstance(n, ast.ClassDef)}
+        self.new_functions = {n.name: n for n in self.new_ast.body
+                              if isinstance(n, ast.FunctionDef)}
+        self.new_classes = {n.name: n for n in self.new_ast.body
+                            if isinstance(n, ast.ClassDef)}
 
     def analyze_changes(self) -> ChangeAnalysis:
         changes = ChangeAnalysis()
 
-        changes.added_functions = list(
-            set(self.new_visitor.functions.keys()) - set(self.old_visitor.functions.keys()))
-        changes.removed_functions = list(
-            set(self.old_visitor.functions.keys()) - set(self.new_visitor.functions.keys()))
-
-        for func_name in set(self.old_visitor.functions.keys()) & set(self.new_visitor.functions.keys()):
-            function_change = self._analyze_function_change(func_name)
-            changes.function_changes.append(function_change)
+        # dict keys views support set operations directly, so no
+        # intermediate sets need materializing.
+        old_keys = self.old_functions.keys()
+        new_keys = self.new_functions.keys()
+        changes.added_functions = list(new_keys - old_keys)
+        changes.removed_functions = list(old_keys - new_keys)
+
+        shared_funcs = old_keys & new_keys
+
+        if len(shared_funcs) >= _PARALLEL_THRESHOLD:
+            # CPU-bound AST work is GIL-bound in-process; for large inputs
+            # fan the per-function pairs out across processes (AST nodes
+            # pickle fine). Below the threshold the pool setup costs more
+            # than it saves.
+            pairs = [(name, self.old_functions[name], self.new_functions[name])
+                     for name in shared_funcs]
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                changes.function_changes = list(
+                    executor.map(_analyze_function_change_worker, pairs))
+        else:
+            for func_name in shared_funcs:
+                function_change = self._analyze_function_change(func_name)
+                changes.function_changes.append(function_change)
 
         changes.class_method_changes = self._analyze_class_method_changes()
 
         return changes
 
     def _analyze_function_change(self, func_name: str) -> FunctionChange:
-        old_func = self.old_visitor.functions[func_name]
-        new_func = self.new_visitor.functions[func_name]
+        old_func = self.old_functions[func_name]
+        new_func = self.new_functions[func_name]
+
+        # Unchanged functions are the common case in real diffs: one hash
+        # compare of the whole-function dumps skips the detailed analysis.
+        if _tree_hash(old_func) == _tree_hash(new_func):
+            return FunctionChange(name=func_name)
 
         signature_change = self._has_signature_change(old_func, new_func)
         body_change = self._analyze_body_change(old_func.body, new_func.body)
@@ -102,12 +244,16 @@ class CodeChangeAnalyzer:
             nested_function_change=nested_function_change
         )
 
-    def _has_signature_change(self, old_func: ast.FunctionDef, new_func: ast.FunctionDef) -> bool:
-        return not self._compare_ast_nodes(old_func.args, new_func.args)
+    @staticmethod
+    def _has_signature_change(old_func: ast.FunctionDef, new_func: ast.FunctionDef) -> bool:
+        # One C-level string compare (memoized per node) instead of a
+        # Python walk over the arguments subtree; matches ast2.py.
+        return _tree_hash(old_func.args) != _tree_hash(new_func.args)
 
-    def _analyze_body_change(self, old_body: List[ast.stmt], new_body: List[ast.stmt]) -> ChangeType:
-        old_hashes = [ASTHasher().visit(stmt) for stmt in old_body]
-        new_hashes = [ASTHasher().visit(stmt) for stmt in new_body]
+    @staticmethod
+    def _analyze_body_change(old_body: List[ast.stmt], new_body: List[ast.stmt]) -> ChangeType:
+        old_hashes = [_tree_hash(stmt) for stmt in old_body]
+        new_hashes = [_tree_hash(stmt) for stmt in new_body]
 
         if old_hashes == new_hashes:
             return ChangeType()
@@ -126,29 +272,32 @@ class CodeChangeAnalyzer:
 
         return change_type
 
-    def _has_nested_function_change(self, old_func: ast.FunctionDef, new_func: ast.FunctionDef) -> bool:
-        old_nested = set(node.name for node in ast.walk(
-            old_func) if isinstance(node, ast.FunctionDef) and node != old_func)
-        new_nested = set(node.name for node in ast.walk(
-            new_func) if isinstance(node, ast.FunctionDef) and node != new_func)
-        return old_nested != new_nested
+    @staticmethod
+    def _has_nested_function_change(old_func: ast.FunctionDef, new_func: ast.FunctionDef) -> bool:
+        return _nested_names(old_func) != _nested_names(new_func)
 
     def _analyze_class_method_changes(self) -> List[ClassMethodChange]:
         changed_methods = []
 
-        for class_name in set(self.old_visitor.classes.keys()) & set(self.new_visitor.classes.keys()):
-            old_class = self.old_visitor.classes[class_name]
-            new_class = self.new_visitor.classes[class_name]
+        for class_name in self.old_classes.keys() & self.new_classes.keys():
+            old_class = self.old_classes[class_name]
+            new_class = self.new_classes[class_name]
 
-            old_methods = {node.name: node for node in ast.walk(
-                old_class) if isinstance(node, ast.FunctionDef)}
-            new_methods = {node.name: node for node in ast.walk(
-                new_class) if isinstance(node, ast.FunctionDef)}
+            # Only direct methods count; scanning class.body avoids walking
+            # every expression in every method (and stops nested local
+            # functions from shadowing same-named methods).
+            old_methods = {node.name: node for node in old_class.body
+                           if isinstance(node, ast.FunctionDef)}
+            new_methods = {node.name: node for node in new_class.body
+                           if isinstance(node, ast.FunctionDef)}
 
-            for method_name in set(old_methods.keys()) & set(new_methods.keys()):
+            for method_name in old_methods.keys() & new_methods.keys():
                 old_method = old_methods[method_name]
                 new_method = new_methods[method_name]
 
+                if _tree_hash(old_method) == _tree_hash(new_method):
+                    continue
+
                 signature_change = self._has_signature_change(
                     old_method, new_method)
                 body_change = self._analyze_body_change(
@@ -164,30 +313,21 @@ class CodeChangeAnalyzer:
 
         return changed_methods
 
-    def _compare_ast_nodes(self, node1: ast.AST, node2: ast.AST) -> bool:
-        if type(node1) != type(node2):
-            return False
-
-        for field in node1._fields:
-            value1 = getattr(node1, field)
-            value2 = getattr(node2, field)
 
-            if isinstance(value1, ast.AST) and isinstance(value2, ast.AST):
-                if not self._compare_ast_nodes(value1, value2):
-                    return False
-            elif isinstance(value1, list) and isinstance(value2, list):
-                if len(value1) != len(value2):
-                    return False
-                for item1, item2 in zip(value1, value2):
-                    if isinstance(item1, ast.AST) and isinstance(item2, ast.AST):
-                        if not self._compare_ast_nodes(item1, item2):
-                            return False
-                    elif item1 != item2:
-                        return False
-            elif value1 != value2:
-                return False
-
-        return True
+def _analyze_function_change_worker(pair) -> FunctionChange:
+    """Process-pool entry point: analyze one (name, old, new) function pair."""
+    func_name, old_func, new_func = pair
+    if _tree_hash(old_func) == _tree_hash(new_func):
+        return FunctionChange(name=func_name)
+    return FunctionChange(
+        name=func_name,
+        signature_change=CodeChangeAnalyzer._has_signature_change(
+            old_func, new_func),
+        body_change=CodeChangeAnalyzer._analyze_body_change(
+            old_func.body, new_func.body),
+        nested_function_change=CodeChangeAnalyzer._has_nested_function_change(
+            old_func, new_func)
+    )
 
 
 # Example usage
@@ -223,7 +363,8 @@ def new_function():
     pass
 """
 
-analyzer = CodeChangeAnalyzer(old_code, new_code)
-changes = analyzer.analyze_changes()
+if __name__ == "__main__":
+    analyzer = CodeChangeAnalyzer(old_code, new_code)
+    changes = analyzer.analyze_changes()
 
-print(changes.model_dump_json(indent=2))
+    print(_to_json(changes))
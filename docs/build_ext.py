@@ -0,0 +1,26 @@
+"""Optionally compile the analyzer modules to C extensions with mypyc.
+
+Run from this directory:
+
+    python build_ext.py
+
+This produces ast2.*.so / astTest.*.so next to the sources. Python prefers
+a compiled extension over the matching .py file, so the analyzers get
+mypyc's AOT speedup (typically 2-4x on the pure-Python hot paths) without
+any import changes, and fall back to the plain modules when the extensions
+are absent. Requires mypy (pip install mypy) and a C compiler.
+"""
+import sys
+
+try:
+    from mypyc.build import mypycify
+except ImportError:
+    sys.exit("mypyc is not available; install mypy to build the extensions.")
+
+from setuptools import setup
+
+setup(
+    name="ams-ast-analyzers",
+    ext_modules=mypycify(["ast2.py", "astTest.py"]),
+    script_args=["build_ext", "--inplace"],
+)